@@ -15,10 +15,22 @@ the Free Software Foundation, either version 3 of the License, or
 
 import argparse
 import csv
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
 import re
 import sys
+import tempfile
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 try:
     import pdfplumber
@@ -32,12 +44,21 @@ except ImportError:
 
 try:
     import pytesseract
-    from PIL import Image
-    import io
 except ImportError:
     pytesseract = None
+
+try:
+    from PIL import Image
+except ImportError:
     Image = None
 
+# tesserocr is only imported inside the OCR worker, after OMP_THREAD_LIMIT is
+# set, as its OpenMP runtime reads the limit once when the library is loaded.
+# Pages are handed to it as Pillow images.
+_TESSEROCR_AVAILABLE = (
+    importlib.util.find_spec("tesserocr") is not None and Image is not None
+)
+
 
 # South African bank universal branch codes
 SA_BANK_BRANCH_CODES = {
@@ -120,105 +141,247 @@ INVESTEC_HEADERS = [
     "Beneficiary Cell Number",
 ]
 
+# Investec limit for the reference and statement description fields
+INVESTEC_MAX_REFERENCE_LENGTH = 20
+
+# Precompiled patterns shared by the parsers
+_ACCOUNT_SEARCH_RE = re.compile(r'\b(\d{8,11})\b')
+_AMOUNT_RE = re.compile(r'^[\d, ]+\.\d{2}$')
+_AMOUNT_OR_DATE_RE = re.compile(r'^(?:[\d, ]+\.\d{2}|\d{2}\s+\w{3}\s+\d{4})$')
+# Amount, day or year
+_NAME_REJECT_RE = re.compile(r'^(?:[\d, ]+\.\d{2}|\d{2}|20\d{2})$')
+_LETTERS_RE = re.compile(r'[A-Za-z]{2,}')
+
+# Header and section text marking a table row as not being a recipient
+_TABLE_SKIP_RE = re.compile('|'.join(map(re.escape, [
+    'Name', 'Pay Amount', 'Last Paid', 'Amount', 'Their Reference',
+    'My Reference', 'Please note', 'Due to system', 'Real-time'
+])))
+
+# Section headers marking an OCR text line as not being a recipient
+_TEXT_SKIP_RE = re.compile('|'.join(map(re.escape, [
+    'Pay recipient', 'Due to system', 'Please note', 'Last Paid',
+    'Pay Amount', 'Their Reference', 'My Reference', 'Name',
+    'Education', 'Entertainment/sports', 'Medical', 'Motoring',
+    'Personal Services', 'Household Maintenance', 'Family And Friends',
+    'Not Categorised', 'Real-time payments', 'View the cut-off',
+    'Inactive Recipient', 'Amount'
+])))
+
+# Whole words that are never part of a name or reference
+_MONTHS = frozenset({
+    'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
+})
+_NAME_SKIP_WORDS = frozenset({'0.00', 'Inactive', 'Recipient'})
+_REF_HEADER_WORDS = frozenset({'Their', 'My', 'Reference', 'Amount'})
+_NAME_REJECT_WORDS = _MONTHS | _NAME_SKIP_WORDS
+
+# Slack for the lower bound of the bisected y windows. 'y >= acc_y - 35' and
+# 'acc_y - y <= 35' round differently for floats, so the window is widened
+# slightly and the exact check is applied to the words inside it
+_WINDOW_SLACK = 1e-6
+
+# PDFs with fewer pages than this are processed in a single process, as
+# starting worker processes would cost more than it saves
+PARALLEL_MIN_PAGES = 4
+
+# In auto mode, the next method is only tried when no more than this share
+# of a method's recipients look plausible, i.e. the result is mostly noise
+MIN_EXTRACTION_CONFIDENCE = 0.5
+
+# OCR results are cached here, keyed on a hash of the PDF contents. The cache
+# holds names and account numbers, so it is only readable by the user.
+OCR_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "convert-fnb-to-investec"
+)
+
+# The cache stores parsed recipients, so bump this whenever parse_fnb_text
+# changes its output to stop stale results from being reused
+OCR_CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=4)
+def _count_pages_pymupdf(pdf_path: str, mtime_ns: int) -> int:
+    """
+    Count the pages in a PDF as PyMuPDF sees them.
+    Cached on path and modification time so that the PyMuPDF and OCR
+    methods in auto mode don't both open the PDF just to count its pages.
+    """
+    doc = fitz.open(pdf_path)
+    page_count = doc.page_count
+    doc.close()
+    return page_count
+
+
+@lru_cache(maxsize=4)
+def _count_pages_pdfplumber(pdf_path: str, mtime_ns: int) -> int:
+    """Count the pages in a PDF as pdfplumber sees them."""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pages(
+    worker,
+    count_pages,
+    pdf_path: str,
+    jobs: Optional[int] = None
+) -> list[dict]:
+    """
+    Run worker(pdf_path, page_range) over every page of the PDF.
+
+    Pages are counted with count_pages(pdf_path, mtime_ns), which must use
+    the same library as the worker. PyMuPDF repairs some broken files that
+    pdfminer can't read, so the two can disagree on the page count.
 
-def extract_with_pdfplumber(pdf_path: str) -> list[dict]:
+    Pages are independent, so larger PDFs are split into one contiguous
+    page range per worker process (jobs, default one per CPU). Processes are
+    used rather than threads as MuPDF and pdfminer are not thread-safe.
+    Each worker reopens the PDF itself, as open documents cannot be pickled.
+    Results are returned in page order.
+    """
+    page_count = count_pages(pdf_path, os.stat(pdf_path).st_mtime_ns)
+    processes = min(jobs or os.cpu_count() or 1, page_count)
+    if page_count < PARALLEL_MIN_PAGES or processes < 2:
+        return worker(pdf_path, range(page_count))
+
+    # Spread pages as evenly as possible across the processes
+    chunk, extra = divmod(page_count, processes)
+    page_ranges = []
+    start = 0
+    for i in range(processes):
+        end = start + chunk + (1 if i < extra else 0)
+        page_ranges.append(range(start, end))
+        start = end
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # Each worker only deduplicates its own pages, so merge the results
+        # in page order and keep only the first recipient for each account
+        results = executor.map(partial(worker, pdf_path), page_ranges)
+        return deduplicate_recipients(chain.from_iterable(results))
+
+
+def extract_with_pdfplumber(pdf_path: str, jobs: Optional[int] = None) -> list[dict]:
     """Extract recipient data using pdfplumber with word-level extraction."""
     if pdfplumber is None:
         raise ImportError("pdfplumber is not installed")
 
+    return _extract_pages(
+        _extract_pdfplumber_pages, _count_pages_pdfplumber, pdf_path, jobs
+    )
+
+
+def _extract_pdfplumber_pages(pdf_path: str, page_range: range) -> list[dict]:
+    """Extract recipient data from a range of pages using pdfplumber."""
     recipients = []
+    seen_accounts = set()
 
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
+        for page_num in page_range:
+            page = pdf.pages[page_num]
             # Use word-level extraction for better control
             words = page.extract_words(keep_blank_chars=False, x_tolerance=3, y_tolerance=3)
-            page_recipients = parse_pdfplumber_words(words)
+            page_recipients = parse_pdfplumber_words(words, seen_accounts)
             recipients.extend(page_recipients)
 
     return recipients
 
 
-def parse_pdfplumber_words(words: list[dict]) -> list[dict]:
-    """Parse words from pdfplumber to extract recipient data."""
+def parse_pdfplumber_words(
+    words: list[dict],
+    seen_accounts: Optional[set[str]] = None
+) -> list[dict]:
+    """
+    Parse words from pdfplumber to extract recipient data.
+    Accounts already in seen_accounts are skipped; new ones are added to it.
+    """
     recipients = []
-    account_pattern = re.compile(r'^(\d{8,11})$')
+    if seen_accounts is None:
+        seen_accounts = set()
+
+    # Reduce each word to a compact (y, x, text) tuple, sorted by y
+    # position first, then x position
+    words_sorted = sorted(
+        ((w['top'], w['x0'], w['text'].strip()) for w in words),
+        key=itemgetter(0, 1)
+    )
 
-    # Sort words by y position first, then x position
-    words_sorted = sorted(words, key=lambda w: (w['top'], w['x0']))
+    # Find account numbers (8-11 digits) and their positions
+    account_positions = [
+        (y, text) for y, _, text in words_sorted
+        if 8 <= len(text) <= 11 and text.isdecimal()
+    ]
 
-    # Find account numbers and their positions
-    account_positions = []
+    # Collect candidate name words (x < 130) and reference words (x > 400)
+    # into two lists, each with a parallel list of y positions so each account
+    # can bisect to the words just above it. Both are filled in sorted order,
+    # so candidates come out already sorted by y then x.
+    name_candidates = []
+    ref_candidates = []
+    # Dates, amounts and status labels repeat down the page, so the reject
+    # decision is cached per distinct text
+    rejected_texts = {}
     for word in words_sorted:
-        text = word['text'].strip()
-        if account_pattern.match(text):
-            account_positions.append({
-                'account': text,
-                'x': word['x0'],
-                'y': word['top'],
-            })
+        _, word_x, text = word
 
-    # For each account number, find the associated name and reference
-    # Names are ABOVE the account number in FNB PDFs (within ~35 pixels above)
-    # References are in the rightmost column (x > 400)
-    for acc_info in account_positions:
-        account = acc_info['account']
-        acc_y = acc_info['y']
+        if not text or 130 <= word_x <= 400:
+            continue
+        # Skip monetary amounts, dates and status labels
+        is_rejected = rejected_texts.get(text)
+        if is_rejected is None:
+            is_rejected = rejected_texts[text] = (
+                _NAME_REJECT_RE.match(text) is not None or text in _NAME_REJECT_WORDS
+            )
+        if is_rejected:
+            continue
 
-        name_words = []
-        ref_words = []
+        if word_x < 130:
+            name_candidates.append(word)
+        else:
+            ref_candidates.append(word)
 
-        for word in words_sorted:
-            word_y = word['top']
-            word_x = word['x0']
-            text = word['text'].strip()
+    name_tops = [word[0] for word in name_candidates]
+    ref_tops = [word[0] for word in ref_candidates]
 
-            if not text or text == account:
-                continue
-
-            # Check if word is above the account (within 35 pixels)
-            y_diff = acc_y - word_y
-            if 0 < y_diff <= 35:
-                # Skip monetary amounts and dates
-                if re.match(r'^[\d,]+\.\d{2}$', text.replace(' ', '')):
-                    continue
-                if re.match(r'^\d{2}$', text):  # Day part of date
-                    continue
-                if text in ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']:
-                    continue
-                if re.match(r'^20\d{2}$', text):  # Year
-                    continue
-                if text in ['0.00', 'Inactive', 'Recipient']:
-                    continue
+    # For each account number, find the associated name and reference
+    # Names are ABOVE the account number in FNB PDFs (within ~35 pixels above)
+    # References are in the rightmost column (x > 400)
+    for acc_y, account in account_positions:
+        if account in seen_accounts:
+            continue
 
-                # Name column (x < 130)
-                if word_x < 130:
-                    name_words.append({'text': text, 'x': word_x, 'y': word_y})
-                # Reference column (x > 400, excluding amounts)
-                elif word_x > 400:
-                    ref_words.append({'text': text, 'x': word_x, 'y': word_y})
+        # Check if word is above the account (within 35 pixels)
+        start = bisect_left(name_tops, acc_y - 35 - _WINDOW_SLACK)
+        end = bisect_left(name_tops, acc_y)
+        name_words = [
+            word for word in name_candidates[start:end]
+            if 0 < acc_y - word[0] <= 35 and word[2] != account
+        ]
 
         # Build name
         if name_words:
-            name_words.sort(key=lambda w: (w['y'], w['x']))
-            name = ' '.join(w['text'] for w in name_words)
+            name = ' '.join(w[2] for w in name_words)
             name = clean_name(name)
 
-            # Build reference - deduplicate words at same position
+            # Build reference from the words in the same 35px window,
+            # deduplicating overlapping text at the same position
             reference = name  # Default to name
-            if ref_words:
-                # Sort by y then x, and deduplicate overlapping text
-                ref_words.sort(key=lambda w: (w['y'], w['x']))
-                seen_positions = set()
-                unique_ref_words = []
-                for w in ref_words:
-                    pos_key = (round(w['y'] / 5), round(w['x'] / 5))
-                    if pos_key not in seen_positions:
-                        seen_positions.add(pos_key)
-                        unique_ref_words.append(w['text'])
-                if unique_ref_words:
-                    reference = ' '.join(unique_ref_words)
+            start = bisect_left(ref_tops, acc_y - 35 - _WINDOW_SLACK)
+            end = bisect_left(ref_tops, acc_y)
+            seen_positions = set()
+            unique_ref_words = []
+            for word_y, word_x, text in ref_candidates[start:end]:
+                if not 0 < acc_y - word_y <= 35 or text == account:
+                    continue
+                pos_key = (round(word_y / 5), round(word_x / 5))
+                if pos_key not in seen_positions:
+                    seen_positions.add(pos_key)
+                    unique_ref_words.append(text)
+            if unique_ref_words:
+                reference = ' '.join(unique_ref_words)
 
             if name and len(name) > 1:
+                seen_accounts.add(account)
                 recipients.append({
                     'name': name,
                     'account': account,
@@ -231,7 +394,6 @@ def parse_pdfplumber_words(words: list[dict]) -> list[dict]:
 def parse_fnb_table(table: list[list]) -> list[dict]:
     """Parse FNB recipient data from extracted table."""
     recipients = []
-    account_pattern = re.compile(r'\b(\d{8,11})\b')
 
     for row in table:
         if not row or all(cell is None or cell == '' for cell in row):
@@ -241,162 +403,180 @@ def parse_fnb_table(table: list[list]) -> list[dict]:
         row_data = [str(cell).strip() if cell else '' for cell in row]
         row_text = ' '.join(row_data)
 
+        # Look for account number in row. Rows without one (most header and
+        # category rows) are dropped before the keyword check.
+        account_match = _ACCOUNT_SEARCH_RE.search(row_text)
+        if not account_match:
+            continue
+
         # Skip header rows and section headers
-        skip_keywords = [
-            'Name', 'Pay Amount', 'Last Paid', 'Amount', 'Their Reference',
-            'My Reference', 'Please note', 'Due to system', 'Real-time'
-        ]
-        if any(keyword in row_text for keyword in skip_keywords):
+        if _TABLE_SKIP_RE.search(row_text):
             continue
 
-        # Look for account number in row
-        account_match = account_pattern.search(row_text)
-        if account_match:
-            account = account_match.group(1)
+        account = account_match.group(1)
 
-            # Try to find the name - usually first non-empty, non-numeric cell
-            name = None
-            reference = None
+        # Try to find the name - usually first non-empty, non-numeric cell
+        name = None
+        reference = None
 
-            for cell in row_data:
-                if not cell:
-                    continue
-                # Skip if it's just the account number
-                if cell == account:
-                    continue
-                # Skip monetary amounts
-                if re.match(r'^[\d,]+\.\d{2}$', cell.replace(' ', '')):
-                    continue
-                # Skip dates
-                if re.match(r'^\d{2}\s+\w{3}\s+\d{4}$', cell):
-                    continue
-                # Skip "Inactive Recipient"
-                if 'Inactive' in cell:
-                    continue
+        for cell in row_data:
+            if not cell:
+                continue
+            # Skip if it's just the account number
+            if cell == account:
+                continue
+            # Skip monetary amounts and dates
+            if _AMOUNT_OR_DATE_RE.match(cell):
+                continue
+            # Skip "Inactive Recipient"
+            if 'Inactive' in cell:
+                continue
 
-                # First valid text is likely the name
-                if name is None and re.search(r'[A-Za-z]{2,}', cell):
-                    name = clean_name(cell)
-                elif name and reference is None and re.search(r'[A-Za-z]{2,}', cell):
-                    reference = cell
+            # First valid text is likely the name
+            if name is None and _LETTERS_RE.search(cell):
+                name = clean_name(cell)
+            elif name and reference is None and _LETTERS_RE.search(cell):
+                reference = cell
 
-            if name and account:
-                recipients.append({
-                    'name': name,
-                    'account': account,
-                    'reference': reference or name
-                })
+        if name and account:
+            recipients.append({
+                'name': name,
+                'account': account,
+                'reference': reference or name
+            })
 
     return recipients
 
 
-def extract_with_pymupdf(pdf_path: str) -> list[dict]:
+def extract_with_pymupdf(pdf_path: str, jobs: Optional[int] = None) -> list[dict]:
     """Extract recipient data using PyMuPDF (fitz) with block-level extraction."""
     if fitz is None:
         raise ImportError("PyMuPDF is not installed")
 
+    return _extract_pages(
+        _extract_pymupdf_pages, _count_pages_pymupdf, pdf_path, jobs
+    )
+
+
+def _extract_pymupdf_pages(pdf_path: str, page_range: range) -> list[dict]:
+    """Extract recipient data from a range of pages using PyMuPDF."""
     recipients = []
+    seen_accounts = set()
 
     doc = fitz.open(pdf_path)
-    for page in doc:
-        page_data = page.get_text("dict")
-        page_recipients = parse_pymupdf_blocks_v2(page_data["blocks"])
+    for page_num in page_range:
+        page = doc[page_num]
+        # Text-only flags skip image blocks, which the parser ignores anyway
+        page_data = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+        page_recipients = parse_pymupdf_blocks_v2(page_data["blocks"], seen_accounts)
         recipients.extend(page_recipients)
     doc.close()
 
     return recipients
 
 
-def parse_pymupdf_blocks_v2(blocks: list) -> list[dict]:
+def parse_pymupdf_blocks_v2(
+    blocks: list,
+    seen_accounts: Optional[set[str]] = None
+) -> list[dict]:
     """
     Parse text blocks from PyMuPDF to extract recipient data.
     FNB PDF has overlapping columns - 'Their Reference' and 'My Reference' at same x position.
     We extract the second occurrence which is 'My Reference'.
+    Accounts already in seen_accounts are skipped; new ones are added to it.
     """
     recipients = []
-    account_pattern = re.compile(r'^(\d{8,11})$')
+    if seen_accounts is None:
+        seen_accounts = set()
+
+    # Flatten the block/line/span nesting into compact (y, x, text) tuples,
+    # in extraction order, stripping each span's text once
+    all_spans = [
+        (span["bbox"][1], span["bbox"][0], text)
+        for block in blocks
+        if "lines" in block
+        for line in block["lines"]
+        for span in line["spans"]
+        if (text := span["text"].strip())
+    ]
+
+    # Find account numbers (8-11 digits)
+    account_spans = [
+        (y, text) for y, _, text in all_spans
+        if 8 <= len(text) <= 11 and text.isdecimal()
+    ]
 
-    # Collect all spans with block index to track overlapping blocks
-    all_spans = []
-    for block_idx, block in enumerate(blocks):
-        if "lines" not in block:
+    # Filter candidate name spans (left column, x < 130) and reference spans
+    # (right column, x > 430, excluding header text) once, sorted by y with a
+    # parallel list of y positions, so each account can bisect to the spans
+    # just above it. Reference spans carry their extraction index, which
+    # decides Their/My Reference below.
+    name_candidates = []
+    ref_candidates = []
+    for idx, span in enumerate(all_spans):
+        y, x, text = span
+        if '.' in text and _AMOUNT_RE.match(text):
             continue
-        block_x = block["bbox"][0]
-        for line in block["lines"]:
-            for span in line["spans"]:
-                text = span["text"].strip()
-                if text:
-                    all_spans.append({
-                        "text": text,
-                        "x": span["bbox"][0],
-                        "y": span["bbox"][1],
-                        "block_idx": block_idx,
-                        "block_x": block_x
-                    })
-
-    # Find account numbers
-    account_spans = [s for s in all_spans if account_pattern.match(s["text"])]
-
-    for acc_span in account_spans:
-        account = acc_span["text"]
-        acc_y = acc_span["y"]
-
-        # Find name - spans above account (within 35px), in left column (x < 130)
-        name_spans = [
-            s for s in all_spans
-            if s["x"] < 130
-            and 0 < acc_y - s["y"] <= 35
-            and not re.match(r'^[\d,]+\.\d{2}$', s["text"].replace(' ', ''))
-            and s["text"] not in ['0.00', 'Inactive', 'Recipient']
-        ]
-        name_spans.sort(key=lambda s: (s["y"], s["x"]))
-        name = ' '.join(s["text"] for s in name_spans)
+        if x < 130 and text not in _NAME_SKIP_WORDS:
+            name_candidates.append(span)
+        elif x > 430 and text not in _REF_HEADER_WORDS:
+            ref_candidates.append((y, idx, text))
+
+    # Stable sorts keep extraction order for spans at the same position
+    name_candidates.sort(key=itemgetter(0, 1))
+    ref_candidates.sort(key=itemgetter(0))
+    name_tops = [span[0] for span in name_candidates]
+    ref_tops = [span[0] for span in ref_candidates]
+
+    for acc_y, account in account_spans:
+        if account in seen_accounts:
+            continue
+
+        # Find name - spans above account (within 35px), in left column
+        start = bisect_left(name_tops, acc_y - 35 - _WINDOW_SLACK)
+        end = bisect_left(name_tops, acc_y)
+        name = ' '.join(
+            text for y, _, text in name_candidates[start:end]
+            if 0 < acc_y - y <= 35
+        )
         name = clean_name(name)
 
-        # Find reference - spans in reference column (x > 430), above account
+        # Find reference - spans in reference column, above account
         # Use y-range of 40px to capture multi-line references without bleeding into adjacent rows
-        # Filter out header text
-        ref_spans = [
-            s for s in all_spans
-            if s["x"] > 430
-            and 0 < acc_y - s["y"] <= 40
-            and not re.match(r'^[\d,]+\.\d{2}$', s["text"].replace(' ', ''))
-            and s["text"].strip() not in ['Their', 'My', 'Reference', 'Amount']
-        ]
+        # Sorting by index restores extraction order
+        start = bisect_left(ref_tops, acc_y - 40 - _WINDOW_SLACK)
+        end = bisect_left(ref_tops, acc_y)
+        ref_spans = sorted(
+            (span for span in ref_candidates[start:end] if 0 < acc_y - span[0] <= 40),
+            key=itemgetter(1)
+        )
 
         # Group spans by y-position (rounded to nearest 2px for more precise grouping)
         # At each y-level, there may be two spans: 'Their Reference' then 'My Reference'
         # We want the second one (My Reference)
-        ref_by_y = {}
-        for s in ref_spans:
-            y_key = round(s["y"] / 2) * 2  # Round to nearest 2px
-            if y_key not in ref_by_y:
-                ref_by_y[y_key] = []
-            ref_by_y[y_key].append(s)
+        ref_by_y = defaultdict(list)
+        for y, _, text in ref_spans:
+            ref_by_y[round(y / 2) * 2].append(text)  # Round to nearest 2px
 
         # Build reference from 'My Reference' column
-        # FNB PDFs have overlapping text - second span at each y is 'My Reference'
+        # FNB PDFs have overlapping text - second span at each y is 'My Reference'.
+        # A single span at a y-level is a continuation of a split reference.
         reference = name
         if ref_by_y:
-            my_ref_spans = []
-            for y_key in sorted(ref_by_y.keys()):
-                spans_at_y = ref_by_y[y_key]
-                if len(spans_at_y) >= 2:
-                    # Two columns - take the second (My Reference)
-                    my_ref_spans.append(spans_at_y[1])
-                elif len(spans_at_y) == 1:
-                    # Single span - check if it looks like a continuation
-                    # or if it might be part of a split reference
-                    span = spans_at_y[0]
-                    my_ref_spans.append(span)
-            if my_ref_spans:
+            my_ref_texts = [
+                texts_at_y[1] if len(texts_at_y) >= 2 else texts_at_y[0]
+                for _, texts_at_y in sorted(ref_by_y.items())
+            ]
+            if my_ref_texts:
                 # Join and clean up the reference
-                ref_text = ' '.join(s["text"].strip() for s in my_ref_spans)
-                ref_text = re.sub(r'\s+', ' ', ref_text).strip()
+                ref_text = ' '.join(
+                    word for text in my_ref_texts for word in text.split()
+                )
                 if ref_text:
                     reference = ref_text
 
         if name and len(name) > 1:
+            seen_accounts.add(account)
             recipients.append({
                 'name': name,
                 'account': account,
@@ -406,35 +586,161 @@ def parse_pymupdf_blocks_v2(blocks: list) -> list[dict]:
     return recipients
 
 
-def extract_with_ocr(pdf_path: str) -> list[dict]:
-    """Extract recipient data using OCR (pytesseract)."""
-    if pytesseract is None or Image is None:
-        raise ImportError("pytesseract or Pillow is not installed")
+def extract_with_ocr(
+    pdf_path: str,
+    jobs: Optional[int] = None,
+    force_refresh: bool = False
+) -> list[dict]:
+    """
+    Extract recipient data using OCR (tesserocr if installed, else pytesseract).
+
+    OCR is slow, so results are cached in OCR_CACHE_DIR keyed on a hash of
+    the PDF contents and OCR_CACHE_VERSION. A cached result is reused unless
+    force_refresh is set.
+    """
+    if pytesseract is None and not _TESSEROCR_AVAILABLE:
+        raise ImportError("Neither pytesseract nor tesserocr+Pillow is installed")
     if fitz is None:
         raise ImportError("PyMuPDF is required for OCR extraction")
 
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as pdf_file:
+        for chunk in iter(lambda: pdf_file.read(1 << 20), b''):
+            digest.update(chunk)
+    cache_path = OCR_CACHE_DIR / f"{digest.hexdigest()}-v{OCR_CACHE_VERSION}.json"
+
+    if not force_refresh:
+        try:
+            with open(cache_path, encoding='utf-8') as cache_file:
+                recipients = json.load(cache_file)
+            # Treat a cache file that doesn't hold recipients like a miss
+            if isinstance(recipients, list) and all(
+                isinstance(r, dict)
+                and all(
+                    isinstance(r.get(key), str)
+                    for key in ('name', 'account', 'reference')
+                )
+                for r in recipients
+            ):
+                print(f"Using cached OCR results: {cache_path}")
+                return recipients
+        except (OSError, ValueError):
+            pass
+
+    recipients = _extract_pages(
+        _extract_ocr_pages, _count_pages_pymupdf, pdf_path, jobs
+    )
+
+    # Failing to write the cache shouldn't fail the extraction
+    if recipients:
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            cache_fd = os.open(
+                cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+            )
+            with open(cache_fd, 'w', encoding='utf-8') as cache_file:
+                json.dump(recipients, cache_file)
+        except OSError as e:
+            print(f"Warning: Could not write OCR cache: {e}", file=sys.stderr)
+
+    return recipients
+
+
+def _extract_ocr_pages(pdf_path: str, page_range: range) -> list[dict]:
+    """Extract recipient data from a range of pages using OCR."""
     recipients = []
+    seen_accounts = set()
 
-    doc = fitz.open(pdf_path)
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        # Render page to image at high resolution
-        mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better OCR
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        img = Image.open(io.BytesIO(img_data))
+    if not page_range:
+        return recipients
 
-        # Perform OCR
-        text = pytesseract.image_to_string(img)
-        if text:
-            recipients.extend(parse_fnb_text(text))
+    # When OCR runs in several worker processes, stop each Tesseract run from
+    # also starting its own OpenMP threads and oversubscribing the CPUs. This
+    # must happen before tesserocr is imported.
+    if multiprocessing.parent_process() is not None:
+        os.environ.setdefault('OMP_THREAD_LIMIT', '1')
 
-    doc.close()
+    doc = fitz.open(pdf_path)
+    try:
+        page_texts = None
+        if _TESSEROCR_AVAILABLE:
+            page_texts = _ocr_pages_tesserocr(doc, page_range)
+        if page_texts is None:
+            page_texts = _ocr_pages_pytesseract(doc, page_range)
+    finally:
+        doc.close()
+
+    for page_text in page_texts:
+        if page_text.strip():
+            recipients.extend(parse_fnb_text(page_text, seen_accounts))
 
     return recipients
 
 
-def parse_fnb_text(text: str) -> list[dict]:
+def _render_ocr_page(page):
+    """Render a page to a grayscale pixmap at 2x zoom for better OCR."""
+    # Tesseract works on grayscale anyway, so skip the colour channels
+    return page.get_pixmap(
+        matrix=fitz.Matrix(2.0, 2.0), colorspace=fitz.csGRAY, alpha=False
+    )
+
+
+def _ocr_pages_tesserocr(doc, page_range: range) -> Optional[list[str]]:
+    """
+    OCR a range of pages with tesserocr, returning the text of each page.
+    Returns None if Tesseract can't be initialised and pytesseract can be
+    used instead.
+    """
+    from tesserocr import PyTessBaseAPI
+
+    # tesserocr keeps one Tesseract engine loaded in this process, so the
+    # language model is only read once for the whole range of pages
+    try:
+        api = PyTessBaseAPI()
+    except RuntimeError as e:
+        if pytesseract is None:
+            raise
+        print(f"Warning: tesserocr failed, using pytesseract: {e}", file=sys.stderr)
+        return None
+
+    page_texts = []
+    with api:
+        for page_num in page_range:
+            pix = _render_ocr_page(doc[page_num])
+            api.SetImage(Image.frombytes("L", (pix.width, pix.height), pix.samples))
+            page_texts.append(api.GetUTF8Text())
+
+    return page_texts
+
+
+def _ocr_pages_pytesseract(doc, page_range: range) -> list[str]:
+    """OCR a range of pages with pytesseract, returning the text of each page."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_paths = []
+
+        for page_num in page_range:
+            pix = _render_ocr_page(doc[page_num])
+            # Uncompressed PNM is much quicker to write and read back than PNG
+            image_path = os.path.join(tmp_dir, f"page-{page_num:05d}.pnm")
+            pix.save(image_path)
+            image_paths.append(image_path)
+
+        # Tesseract treats a .txt input as a list of images, so every page is
+        # OCRed in a single run instead of starting Tesseract once per page
+        list_path = os.path.join(tmp_dir, "pages.txt")
+        with open(list_path, 'w', encoding='utf-8') as list_file:
+            list_file.write('\n'.join(image_paths) + '\n')
+
+        text = pytesseract.image_to_string(list_path)
+
+    # Tesseract ends each page with a form feed
+    return text.split('\f')
+
+
+def parse_fnb_text(
+    text: str,
+    seen_accounts: Optional[set[str]] = None
+) -> list[dict]:
     """
     Parse FNB recipient text and extract recipient information.
 
@@ -442,51 +748,38 @@ def parse_fnb_text(text: str) -> list[dict]:
     - Beneficiary Name (e.g., "P Holroyd T/a Tiny Twiste")
     - Account Number (8-11 digit number)
     - Reference information
+
+    Accounts already in seen_accounts are skipped; new ones are added to it.
     """
     recipients = []
+    if seen_accounts is None:
+        seen_accounts = set()
 
-    # Pattern to match account numbers (8-11 digits typically for SA banks)
-    account_pattern = re.compile(r'\b(\d{8,11})\b')
+    def save_recipient(name: str, account: str, reference: Optional[str]) -> None:
+        if account in seen_accounts:
+            return
+        seen_accounts.add(account)
+        recipients.append({
+            'name': name,
+            'account': account,
+            'reference': reference or name
+        })
 
-    # Split text into lines for processing
-    lines = text.split('\n')
+    # Split text into stripped, non-empty lines for processing
+    lines = [line for line in (raw.strip() for raw in text.split('\n')) if line]
 
     # Track current recipient being built
     current_name = None
     current_account = None
     current_reference = None
 
-    # Known section headers to skip
-    skip_sections = [
-        'Pay recipient', 'Due to system', 'Please note', 'Last Paid',
-        'Pay Amount', 'Their Reference', 'My Reference', 'Name',
-        'Education', 'Entertainment/sports', 'Medical', 'Motoring',
-        'Personal Services', 'Household Maintenance', 'Family And Friends',
-        'Not Categorised', 'Real-time payments', 'View the cut-off',
-        'Inactive Recipient', 'Amount'
-    ]
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-
-        # Skip empty lines and section headers
-        if not line or any(skip in line for skip in skip_sections):
-            i += 1
-            continue
-
-        # Skip monetary amounts
-        if re.match(r'^[\d,]+\.\d{2}$', line.replace(' ', '')):
-            i += 1
-            continue
-
-        # Skip date patterns
-        if re.match(r'^\d{2}\s+\w{3}\s+\d{4}$', line):
-            i += 1
+    for line in lines:
+        # Skip section headers, monetary amounts and dates
+        if _TEXT_SKIP_RE.search(line) or _AMOUNT_OR_DATE_RE.match(line):
             continue
 
         # Look for account numbers
-        account_match = account_pattern.search(line)
+        account_match = _ACCOUNT_SEARCH_RE.search(line)
         if account_match:
             potential_account = account_match.group(1)
             # Check if this line is primarily an account number
@@ -495,29 +788,20 @@ def parse_fnb_text(text: str) -> list[dict]:
                     current_account = potential_account
                 elif current_name and current_account:
                     # Save previous recipient and start new one
-                    recipients.append({
-                        'name': current_name,
-                        'account': current_account,
-                        'reference': current_reference or current_name
-                    })
+                    save_recipient(current_name, current_account, current_reference)
                     current_name = None
                     current_account = potential_account
                     current_reference = None
                 else:
                     current_account = potential_account
-                i += 1
                 continue
 
         # Check if this looks like a name (contains letters, possibly business suffixes)
-        if re.search(r'[A-Za-z]{2,}', line) and not re.match(r'^\d+$', line):
+        if _LETTERS_RE.search(line):
             # This might be a name
             if current_name and current_account:
                 # Save the previous recipient
-                recipients.append({
-                    'name': current_name,
-                    'account': current_account,
-                    'reference': current_reference or current_name
-                })
+                save_recipient(current_name, current_account, current_reference)
                 current_reference = None
 
             # Check if line contains both name and account
@@ -534,95 +818,116 @@ def parse_fnb_text(text: str) -> list[dict]:
                 current_name = clean_name(line)
                 current_account = None
 
-        i += 1
-
     # Don't forget the last recipient
     if current_name and current_account:
-        recipients.append({
-            'name': current_name,
-            'account': current_account,
-            'reference': current_reference or current_name
-        })
+        save_recipient(current_name, current_account, current_reference)
 
     return recipients
 
 
 def clean_name(name: str) -> str:
     """Clean up beneficiary name."""
-    # Remove multiple spaces
-    name = re.sub(r'\s+', ' ', name)
-    # Remove leading/trailing whitespace
-    name = name.strip()
+    # Splitting on whitespace collapses multiple spaces and trims both ends
+    parts = name.split()
     # Remove trailing numbers that might be partial account numbers
-    name = re.sub(r'\s+\d+$', '', name)
-    return name
+    if len(parts) > 1 and parts[-1].isdecimal():
+        parts.pop()
+    return ' '.join(parts)
 
 
-def deduplicate_recipients(recipients: list[dict]) -> list[dict]:
-    """Remove duplicate recipients based on account number."""
-    seen_accounts = set()
-    unique_recipients = []
+def count_plausible_recipients(recipients: list[dict]) -> int:
+    """
+    Count recipients with an account and a name that contains letters and
+    isn't just a table heading such as "Amount". Names like "12" or "Amount"
+    come from misread columns, so a result full of them is noise.
+    """
+    return sum(
+        1 for r in recipients
+        if r['account']
+        and _LETTERS_RE.search(r['name'])
+        and not _TABLE_SKIP_RE.fullmatch(r['name'])
+    )
+
+
+def deduplicate_recipients(recipients: Iterable[dict]) -> list[dict]:
+    """
+    Remove duplicate recipients based on account number.
+    Accepts any iterable, so a stream of recipients can be deduplicated
+    without first collecting every duplicate into a list.
+    """
+    # Dicts keep insertion order, so this keeps the first recipient seen for
+    # each account, in their original order
+    unique_recipients = {}
 
     for recipient in recipients:
-        account = recipient['account']
-        if account not in seen_accounts:
-            seen_accounts.add(account)
-            unique_recipients.append(recipient)
+        unique_recipients.setdefault(recipient['account'], recipient)
+
+    return list(unique_recipients.values())
 
-    return unique_recipients
 
+def iter_investec_rows(recipients: Iterable[dict]) -> Iterator[tuple]:
+    """Convert FNB recipients to Investec CSV rows, in INVESTEC_HEADERS order.
 
-def convert_to_investec_format(recipients: list[dict]) -> list[dict]:
-    """Convert FNB recipients to Investec CSV format.
+    Rows are generated one at a time so they can be streamed straight to
+    the CSV writer.
 
     Note: Bank and branch code fields are left empty as the FNB PDF does not
     contain this information. Users must fill these in manually or use
     the --default-bank option.
     """
-    investec_records = []
-
     for recipient in recipients:
         # Get bank info if provided in recipient data, otherwise leave empty
         bank = recipient.get('bank', '')
         branch_code = recipient.get('branch_code', '')
-
-        record = {
-            "Beneficiary Account Name": recipient['name'],
-            "Beneficiary Bank": bank,
-            "Beneficiary Bank Account Number": recipient['account'],
-            "Beneficiary Branch Code": branch_code,
-            "Beneficiary Reference": recipient.get('reference', recipient['name'])[:20],
-            "Statement Description": recipient['name'][:20],
-            "Beneficiary Name": recipient['name'],
-            "Beneficiary Fax Number": "",
-            "Beneficiary Email Address": "",
-            "Beneficiary Cell Number": "",
-        }
-        investec_records.append(record)
-
-    return investec_records
+        account = recipient['account']
+        name = recipient['name']
+        reference = recipient.get('reference', name)[:INVESTEC_MAX_REFERENCE_LENGTH]
+        description = name[:INVESTEC_MAX_REFERENCE_LENGTH]
+
+        yield (
+            name,               # Beneficiary Account Name
+            bank,               # Beneficiary Bank
+            account,            # Beneficiary Bank Account Number
+            branch_code,        # Beneficiary Branch Code
+            reference,          # Beneficiary Reference
+            description,        # Statement Description
+            name,               # Beneficiary Name
+            "",                 # Beneficiary Fax Number
+            "",                 # Beneficiary Email Address
+            "",                 # Beneficiary Cell Number
+        )
 
 
-def write_investec_csv(records: list[dict], output_path: str) -> None:
+def write_investec_csv(records: Iterable[tuple], output_path: str) -> None:
     """Write records to Investec CSV format."""
-    with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=INVESTEC_HEADERS)
-        writer.writeheader()
+    with open(
+        output_path, 'w', newline='', encoding='utf-8', buffering=1 << 16
+    ) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(INVESTEC_HEADERS)
         writer.writerows(records)
 
 
-def extract_recipients(pdf_path: str, method: str = "auto") -> list[dict]:
+def extract_recipients(
+    pdf_path: str,
+    method: str = "auto",
+    jobs: Optional[int] = None,
+    force_refresh: bool = False
+) -> list[dict]:
     """
     Extract recipients from PDF using specified method.
 
     Args:
         pdf_path: Path to the FNB recipients PDF
         method: Extraction method - "pdfplumber", "pymupdf", "ocr", or "auto"
+        jobs: Number of worker processes for multi-page PDFs (default: CPU count)
+        force_refresh: Ignore cached OCR results and run OCR again
 
     Returns:
         List of recipient dictionaries
     """
     methods_to_try = []
+    extract_with_ocr_cached = partial(extract_with_ocr, force_refresh=force_refresh)
 
     if method == "auto":
         # Try methods in order of preference
@@ -631,38 +936,60 @@ def extract_recipients(pdf_path: str, method: str = "auto") -> list[dict]:
             methods_to_try.append(("pymupdf", extract_with_pymupdf))
         if pdfplumber is not None:
             methods_to_try.append(("pdfplumber", extract_with_pdfplumber))
-        if pytesseract is not None and fitz is not None:
-            methods_to_try.append(("ocr", extract_with_ocr))
+        if (pytesseract is not None or _TESSEROCR_AVAILABLE) and fitz is not None:
+            methods_to_try.append(("ocr", extract_with_ocr_cached))
     elif method == "pdfplumber":
         methods_to_try.append(("pdfplumber", extract_with_pdfplumber))
     elif method == "pymupdf":
         methods_to_try.append(("pymupdf", extract_with_pymupdf))
     elif method == "ocr":
-        methods_to_try.append(("ocr", extract_with_ocr))
+        methods_to_try.append(("ocr", extract_with_ocr_cached))
     else:
         raise ValueError(f"Unknown extraction method: {method}")
 
     if not methods_to_try:
         raise RuntimeError(
             "No PDF extraction libraries available. "
-            "Please install pdfplumber, PyMuPDF, or pytesseract+Pillow."
+            "Please install pdfplumber, PyMuPDF, or pytesseract/tesserocr+Pillow."
         )
 
-    recipients = []
+    # A later method only replaces an earlier result if it finds more
+    # plausible recipients, so a small clean result can't displace a large
+    # mostly-valid one
+    best_recipients = []
+    best_plausible = -1
+    best_method = None
     for method_name, extract_func in methods_to_try:
         try:
             print(f"Trying extraction method: {method_name}")
-            recipients = extract_func(pdf_path)
-            if recipients:
-                print(f"Successfully extracted {len(recipients)} recipients using {method_name}")
-                break
-            else:
-                print(f"No recipients found using {method_name}, trying next method...")
+            recipients = extract_func(pdf_path, jobs)
+            plausible = count_plausible_recipients(recipients)
         except Exception as e:
             print(f"Method {method_name} failed: {e}")
             continue
 
-    return recipients
+        if not recipients:
+            print(f"No recipients found using {method_name}, trying next method...")
+            continue
+
+        if plausible > best_plausible:
+            best_recipients = recipients
+            best_plausible = plausible
+            best_method = method_name
+        if plausible / len(recipients) > MIN_EXTRACTION_CONFIDENCE:
+            break
+        print(
+            f"Only {plausible} of {len(recipients)} recipients found using "
+            f"{method_name} look valid"
+        )
+
+    if best_recipients:
+        print(
+            f"Successfully extracted {len(best_recipients)} recipients "
+            f"using {best_method}"
+        )
+
+    return best_recipients
 
 
 def main():
@@ -719,8 +1046,24 @@ Supported extraction methods:
         help="Auto-detect bank from account number prefix"
     )
 
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Number of worker processes for PDFs with 4+ pages "
+             "(default: number of CPUs)"
+    )
+
+    parser.add_argument(
+        "--force-refresh",
+        action="store_true",
+        help="Ignore cached OCR results and run OCR again"
+    )
+
     args = parser.parse_args()
 
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     # Validate input file
     pdf_path = Path(args.pdf_file)
     if not pdf_path.exists():
@@ -732,19 +1075,18 @@ Supported extraction methods:
 
     # Extract recipients
     print(f"Processing: {pdf_path}")
-    recipients = extract_recipients(str(pdf_path), method=args.method)
+    recipients = extract_recipients(
+        str(pdf_path),
+        method=args.method,
+        jobs=args.jobs,
+        force_refresh=args.force_refresh
+    )
 
     if not recipients:
         print("Error: No recipients could be extracted from the PDF.", file=sys.stderr)
         print("Try using a different extraction method with --method", file=sys.stderr)
         sys.exit(1)
 
-    # Deduplicate
-    original_count = len(recipients)
-    recipients = deduplicate_recipients(recipients)
-    if len(recipients) < original_count:
-        print(f"Removed {original_count - len(recipients)} duplicate entries")
-
     # Apply bank detection or default bank
     if args.detect_bank:
         detected_count = 0
@@ -770,17 +1112,14 @@ Supported extraction methods:
     else:
         print("Note: Bank and branch code fields are empty. Use --detect-bank or --default-bank")
 
-    # Convert to Investec format
-    investec_records = convert_to_investec_format(recipients)
-
-    # Write output
-    write_investec_csv(investec_records, args.output)
-    print(f"Successfully wrote {len(investec_records)} beneficiaries to: {args.output}")
+    # Convert to Investec format and write output
+    write_investec_csv(iter_investec_rows(recipients), args.output)
+    print(f"Successfully wrote {len(recipients)} beneficiaries to: {args.output}")
 
     if args.verbose:
         print("\nExtracted beneficiaries:")
-        for record in investec_records:
-            print(f"  - {record['Beneficiary Account Name']} ({record['Beneficiary Bank Account Number']})")
+        for recipient in recipients:
+            print(f"  - {recipient['name']} ({recipient['account']})")
 
 
 if __name__ == "__main__":